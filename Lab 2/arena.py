@@ -0,0 +1,162 @@
+import sys
+import math
+import random
+import time
+from multiprocessing import Pool
+
+from lab2 import Gomoku, SearchStats, alpha_beta_cutoff_search
+
+#Turn an engine string in the form <eval>,<depth>[,<seconds>] into a config
+def parse_engine(text):
+    parts = text.split(",")
+    if len(parts) not in (2, 3):
+        raise ValueError("Engine must be in the form <eval>,<depth>[,<seconds>]: " + text)
+    eval_func = int(parts[0])
+    if eval_func not in (1, 2):
+        raise ValueError("Evaluation function must be 1 or 2: " + text)
+    depth = int(parts[1])
+    time_limit = float(parts[2]) if len(parts) == 3 else None
+    return {"name": text, "eval_func": eval_func, "depth": depth, "time_limit": time_limit}
+
+#Black takes the center, then both sides play random moves close to it
+def random_opening(game, rng, length, radius=2):
+    center = ((game.h // 2) + 1, (game.v // 2) + 1)
+    opening = [center]
+    area = [(x, y) for x in range(max(center[0] - radius, 1), min(center[0] + radius, game.h) + 1)
+            for y in range(max(center[1] - radius, 1), min(center[1] + radius, game.v) + 1) if (x, y) != center]
+    #Small boards may not have room for the whole opening
+    opening += rng.sample(area, min(length - 1, len(area)))
+    return opening
+
+#Play a single game and return the winner along with each engine's search stats
+def play_game(job):
+    black, white, opening, size, k = job
+    game = Gomoku(size, size, k)
+    engines = {"B": black, "W": white}
+    stats = {"B": {"moves": 0, "time": 0.0, "nodes": 0}, "W": {"moves": 0, "time": 0.0, "nodes": 0}}
+
+    state = game.initial
+    for move in opening:
+        state = game.result(state, move)
+
+    while not game.terminal_test(state):
+        player = state.to_move
+        engine = engines[player]
+        search_stats = SearchStats()
+        move = alpha_beta_cutoff_search(state, game, engine["eval_func"], engine["depth"], engine["time_limit"], search_stats)
+        stats[player]["time"] += search_stats.total_time
+        stats[player]["nodes"] += search_stats.total_nodes()
+        stats[player]["moves"] += 1
+        state = game.result(state, move)
+
+    if state.utility > 0:
+        winner = "B"
+    elif state.utility < 0:
+        winner = "W"
+    else:
+        winner = None
+    return black["name"], white["name"], winner, stats
+
+#Elo difference for a score fraction, a score of 0 or 1 gives an infinite difference
+def score_to_elo(score):
+    if score <= 0:
+        return float("-inf")
+    if score >= 1:
+        return float("inf")
+    return 400 * math.log10(score / (1 - score))
+
+#Elo difference along with the bounds of its 95% interval, or None if no games were played
+def elo_estimate(wins, losses, draws):
+    games = wins + losses + draws
+    if games == 0:
+        return None
+    score = (wins + 0.5 * draws) / games
+    #Wilson score interval, so a clean sweep over a few games still gets a wide interval
+    z = 1.96
+    center = (score + z ** 2 / (2 * games)) / (1 + z ** 2 / games)
+    margin = z * math.sqrt(score * (1 - score) / games + z ** 2 / (4 * games ** 2)) / (1 + z ** 2 / games)
+    return score_to_elo(score), score_to_elo(center - margin), score_to_elo(center + margin)
+
+#Play engine_a against engine_b, each opening is played twice so both engines get each color
+def run_arena(engine_a, engine_b, games, processes=None, opening_length=3, seed=None, size=15, k=5):
+    rng = random.Random(seed)
+    jobs = []
+    for i in range((games + 1) // 2):
+        opening = random_opening(Gomoku(size, size, k), rng, opening_length)
+        jobs.append((engine_a, engine_b, opening, size, k))
+        jobs.append((engine_b, engine_a, opening, size, k))
+    jobs = jobs[:games]
+
+    results = {engine_a["name"]: {"wins": 0, "losses": 0, "draws": 0, "moves": 0, "time": 0.0, "nodes": 0},
+               engine_b["name"]: {"wins": 0, "losses": 0, "draws": 0, "moves": 0, "time": 0.0, "nodes": 0}}
+    with Pool(processes) as pool:
+        for black, white, winner, stats in pool.imap_unordered(play_game, jobs):
+            for name, color in ((black, "B"), (white, "W")):
+                for key in ("moves", "time", "nodes"):
+                    results[name][key] += stats[color][key]
+                if winner is None:
+                    results[name]["draws"] += 1
+                elif winner == color:
+                    results[name]["wins"] += 1
+                else:
+                    results[name]["losses"] += 1
+            print("Game finished:", black, "(B) vs", white, "(W), winner:", winner if winner else "tie")
+    return results
+
+def print_results(results, engine_a, engine_b):
+    print()
+    for name in (engine_a["name"], engine_b["name"]):
+        r = results[name]
+        games = r["wins"] + r["losses"] + r["draws"]
+        print("Engine:", name)
+        print("Wins: %d, Losses: %d, Draws: %d (win rate %.1f%%)" % (r["wins"], r["losses"], r["draws"], 100 * r["wins"] / games if games else 0))
+        if r["time"] > 0:
+            print("Nodes/sec: %.1f" % (r["nodes"] / r["time"]))
+        if r["moves"] > 0:
+            print("Time per move: %.3f seconds" % (r["time"] / r["moves"]))
+        print()
+    a = results[engine_a["name"]]
+    estimate = elo_estimate(a["wins"], a["losses"], a["draws"])
+    if estimate is None:
+        print("No games were played")
+    else:
+        diff, low, high = estimate
+        print("Elo difference (%s vs %s): %+.1f (95%% interval %+.1f to %+.1f)" % (engine_a["name"], engine_b["name"], diff, low, high))
+
+def main():
+    #Check users inputs
+    if len(sys.argv) < 4 or len(sys.argv) > 8:
+        print("Please enter arguments in the form <engine_a> <engine_b> <games> [processes] [seed] [size] [k].")
+        print("Engines are in the form <eval>,<depth>[,<seconds>], for example 2,1,5.")
+        return
+    try:
+        engine_a = parse_engine(sys.argv[1])
+        engine_b = parse_engine(sys.argv[2])
+        games = int(sys.argv[3])
+        processes = int(sys.argv[4]) if len(sys.argv) >= 5 else None
+        seed = int(sys.argv[5]) if len(sys.argv) >= 6 else None
+        size = int(sys.argv[6]) if len(sys.argv) >= 7 else 15
+        k = int(sys.argv[7]) if len(sys.argv) == 8 else 5
+        #Check the board before any games are started
+        Gomoku(size, size, k)
+    except ValueError as error:
+        print(error)
+        return
+    if games < 1:
+        print("The number of games must be at least 1.")
+        return
+    if processes is not None and processes < 1:
+        print("The number of processes must be at least 1.")
+        return
+    if engine_a["name"] == engine_b["name"]:
+        #Keep the names apart so the results don't get merged together
+        engine_a["name"] += " (A)"
+        engine_b["name"] += " (B)"
+
+    start_time = time.time()
+    results = run_arena(engine_a, engine_b, games, processes, seed=seed, size=size, k=k)
+    print_results(results, engine_a, engine_b)
+    print("Time taken: %.3f seconds" % (time.time() - start_time))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+import sys
+import threading
+
+from lab2 import Gomoku, GameState, alpha_beta_cutoff_search
+
+#Gomoku game that remembers the score of every board it has evaluated, so the table carries over between moves
+class CachedGomoku(Gomoku):
+    def __init__(self, h=15, v=15, k=5, max_entries=200000):
+        super().__init__(h, v, k)
+        self.max_entries = max_entries
+        self.eval_cache = {}
+
+    def cached_eval(self, state, eval_func, evaluate):
+        key = (eval_func, frozenset(state.board.items()))
+        score = self.eval_cache.get(key)
+        if score is None:
+            score = evaluate(state)
+            #Start over once the table gets too big instead of growing forever
+            if len(self.eval_cache) >= self.max_entries:
+                self.eval_cache.clear()
+            self.eval_cache[key] = score
+        return score
+
+    def eval_func_one(self, state):
+        return self.cached_eval(state, 1, super().eval_func_one)
+
+    def eval_func_two(self, state):
+        return self.cached_eval(state, 2, super().eval_func_two)
+
+#Engine that thinks about its next move while the opponent is choosing theirs
+class PonderingEngine:
+    def __init__(self, eval_func=2, depth=2, time_limit=None, size=15, k=5):
+        self.eval_func = eval_func
+        self.depth = depth
+        self.time_limit = time_limit
+        self.game = CachedGomoku(size, size, k)
+        self.state = self.game.initial
+        self.ponder_thread = None
+        self.ponder_stop = None
+        self.predicted = None
+        self.pondered_move = None
+
+    #Start a new game, on a new board if the size changed
+    def restart(self, size=None):
+        self.stop_ponder()
+        if size is not None and (size != self.game.h or size != self.game.v):
+            self.game = CachedGomoku(size, size, self.game.k, self.game.max_entries)
+        self.state = self.game.initial
+
+    #Set up the board from a list of (move, own) pairs, the engine is the side to move
+    def set_board(self, stones):
+        self.stop_ponder()
+        squares = [move for move, is_own in stones]
+        for move in squares:
+            if move not in self.game.initial.moves:
+                raise ValueError("invalid board, stone off the board at " + format_move(move))
+        if len(set(squares)) != len(squares):
+            raise ValueError("invalid board, two stones on the same square")
+        own = [move for move, is_own in stones if is_own]
+        other = [move for move, is_own in stones if not is_own]
+        #B always moves first, so the engine has the same number of stones or one fewer
+        if len(own) - len(other) not in (0, -1):
+            raise ValueError("invalid board, stone counts can't happen in a game")
+        color = "B" if len(own) == len(other) else "W"
+        opponent = "W" if color == "B" else "B"
+        board = {move: color for move in own}
+        board.update({move: opponent for move in other})
+        moves = [move for move in self.game.initial.moves if move not in board]
+        self.state = GameState(to_move=color, utility=0, board=board, moves=moves)
+
+    def search(self, state, stop=None, max_depth=None):
+        return alpha_beta_cutoff_search(state, self.game, self.eval_func,
+                                        max_depth if max_depth else self.depth, self.time_limit, stop=stop)
+
+    #Opponent's move came in, reply with the pondered move if it was predicted
+    def turn(self, move):
+        if move not in self.state.moves:
+            raise ValueError("illegal move " + format_move(move))
+        hit = self.ponder_thread is not None and self.predicted == move
+        if hit:
+            #Give the ponder search the rest of the normal time budget to finish
+            self.ponder_thread.join(self.time_limit)
+            self.stop_ponder()
+            reply = self.pondered_move
+        else:
+            self.stop_ponder()
+            reply = None
+        self.state = self.game.result(self.state, move)
+        return self.think(reply)
+
+    #Pick a move (unless one was already pondered), play it and start pondering
+    def think(self, move=None):
+        if self.game.terminal_test(self.state):
+            return None
+        if move is None:
+            move = self.search(self.state)
+        self.state = self.game.result(self.state, move)
+        self.start_ponder()
+        return move
+
+    def start_ponder(self):
+        if self.game.terminal_test(self.state):
+            return
+        self.predicted = None
+        self.pondered_move = None
+        self.ponder_stop = threading.Event()
+        self.ponder_thread = threading.Thread(target=self.ponder, args=(self.state, self.ponder_stop), daemon=True)
+        self.ponder_thread.start()
+
+    #Guess the opponent's reply with a shallow search, then search our answer to it
+    def ponder(self, state, stop):
+        predicted = self.search(state, stop, 1)
+        if stop.is_set() or predicted is None:
+            return
+        self.predicted = predicted
+        next_state = self.game.result(state, predicted)
+        if not self.game.terminal_test(next_state):
+            self.pondered_move = self.search(next_state, stop)
+
+    def stop_ponder(self):
+        if self.ponder_thread is not None:
+            self.ponder_stop.set()
+            self.ponder_thread.join()
+        self.ponder_thread = None
+        self.ponder_stop = None
+        self.predicted = None
+
+#The protocol uses 0-based "x,y" coordinates while the game uses 1-based ones
+def parse_move(text):
+    try:
+        x, y = text.split(",")[:2]
+        return (int(x) + 1, int(y) + 1)
+    except ValueError:
+        raise ValueError("invalid move " + text)
+
+def format_move(move):
+    return "%d,%d" % (move[0] - 1, move[1] - 1)
+
+#Read commands from stdin and answer on stdout, similar to the Gomocup protocol
+def run(engine, commands=sys.stdin, output=sys.stdout):
+    def send(line):
+        output.write(line + "\n")
+        output.flush()
+
+    def send_move(move):
+        send(format_move(move) if move else "ERROR game is over")
+
+    board_lines = None
+    for line in commands:
+        line = line.strip()
+        if not line:
+            continue
+
+        #Collecting the stones of a BOARD command until DONE
+        if board_lines is not None:
+            if line.upper() == "DONE":
+                try:
+                    engine.set_board([(parse_move(stone), stone.split(",")[2] == "1") for stone in board_lines])
+                except ValueError as error:
+                    send("ERROR " + str(error))
+                except IndexError:
+                    send("ERROR invalid board")
+                else:
+                    send_move(engine.think())
+                board_lines = None
+            else:
+                board_lines.append(line)
+            continue
+
+        command, _, args = line.partition(" ")
+        command = command.upper()
+        if command == "START":
+            try:
+                size = int(args) if args else engine.game.h
+            except ValueError:
+                send("ERROR invalid size " + args)
+                continue
+            if size < engine.game.k:
+                send("ERROR unsupported size")
+            else:
+                engine.restart(size)
+                send("OK")
+        elif command == "RESTART":
+            engine.restart()
+            send("OK")
+        elif command == "BEGIN":
+            send_move(engine.think())
+        elif command == "TURN":
+            try:
+                send_move(engine.turn(parse_move(args)))
+            except ValueError as error:
+                send("ERROR " + str(error))
+        elif command == "BOARD":
+            board_lines = []
+        elif command == "INFO":
+            key, _, value = args.partition(" ")
+            #Only the per-turn time limit (in milliseconds) is used
+            if key == "timeout_turn" and value:
+                try:
+                    timeout = int(value)
+                except ValueError:
+                    send("ERROR invalid timeout_turn " + value)
+                    continue
+                engine.time_limit = timeout / 1000 if timeout > 0 else None
+        elif command == "ABOUT":
+            send('name="lab2", version="1.0"')
+        elif command == "END":
+            engine.stop_ponder()
+            break
+        else:
+            send("UNKNOWN " + command)
+
+def main():
+    #Check users inputs
+    if len(sys.argv) > 5:
+        print("Please enter arguments in the form [eval] [depth] [seconds] [k].")
+        return
+    eval_func = int(sys.argv[1]) if len(sys.argv) >= 2 else 2
+    depth = int(sys.argv[2]) if len(sys.argv) >= 3 else 2
+    time_limit = float(sys.argv[3]) if len(sys.argv) >= 4 else None
+    k = int(sys.argv[4]) if len(sys.argv) == 5 else 5
+    run(PonderingEngine(eval_func, depth, time_limit, k=k))
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,47 @@
-from collections import namedtuple
+from collections import defaultdict, namedtuple
+import json
 import time
 
 GameState = namedtuple('GameState', 'to_move, utility, board, moves')
 
 #Gomoku class modified from games.py in the AIMA GitHub
 class Gomoku:
-    def __init__(self):
-        self.h = 15
-        self.v = 15
-        self.k = 5
+    def __init__(self, h=15, v=15, k=5):
+        #A line of k has to fit on the board somewhere, and k = 0 would make every move a win
+        if h < 1 or v < 1:
+            raise ValueError("Board size must be at least 1x1")
+        if k < 1 or k > max(h, v):
+            raise ValueError("k must be between 1 and the board size")
+        self.h = h
+        self.v = v
+        self.k = k
         moves = [(x, y) for x in range(1, self.h + 1) for y in range(1, self.v + 1)]
         self.initial = GameState(to_move='B', utility=0, board={}, moves=moves)
+
+        #Every line of k squares that can win, in the order (1, 0), (0, 1), (1, 1), (1, -1) starting from (x, y)
+        self.lines = []
+        for delta_x, delta_y in [(1, 0), (0, 1), (1, 1), (1, -1)]:
+            for x, y in moves:
+                end_x, end_y = x + delta_x * (self.k - 1), y + delta_y * (self.k - 1)
+                if 1 <= end_x <= self.h and 1 <= end_y <= self.v:
+                    self.lines.append(tuple((x + delta_x * i, y + delta_y * i) for i in range(self.k)))
+
+        #The lines going through each square
+        self.lines_through = {move: [] for move in moves}
+        for line in self.lines:
+            for square in line:
+                self.lines_through[square].append(line)
+
+        #For each square and direction, the squares up to k - 1 steps away on either side
+        self.rays = {}
+        for x, y in moves:
+            self.rays[(x, y)] = []
+            for delta_x, delta_y in [(1, 0), (0, 1), (1, 1), (1, -1)]:
+                forward = tuple((x + delta_x * i, y + delta_y * i) for i in range(1, self.k)
+                                if 1 <= x + delta_x * i <= self.h and 1 <= y + delta_y * i <= self.v)
+                backward = tuple((x - delta_x * i, y - delta_y * i) for i in range(1, self.k)
+                                 if 1 <= x - delta_x * i <= self.h and 1 <= y - delta_y * i <= self.v)
+                self.rays[(x, y)].append((forward, backward))
     
     #Get the list of moves
     def actions(self, state):
@@ -42,28 +73,29 @@ class Gomoku:
                 print(board.get((x, y), '.'), end=' ')
             print()
 
+    #Only a row through the new move can have become a win, count the player's stones on each side of it
     def compute_utility(self, board, move, player):
-        if (self.k_in_row(board, move, player, (0, 1)) or
-            self.k_in_row(board, move, player, (1, 0)) or
-            self.k_in_row(board, move, player, (1, -1)) or
-            self.k_in_row(board, move, player, (1, 1))):
-            return 1000 if player == 'B' else -1000
-        else:
-            return 0
-
-    def k_in_row(self, board, move, player, delta_x_y):
-        delta_x, delta_y = delta_x_y
-        x, y = move
-        n = 0  
-        while board.get((x, y)) == player:
-            n += 1
-            x, y = x + delta_x, y + delta_y
-        x, y = move
-        while board.get((x, y)) == player:
-            n += 1
-            x, y = x - delta_x, y - delta_y
-        n -= 1  
-        return n >= self.k
+        for forward, backward in self.rays[move]:
+            n = 1
+            for square in forward:
+                if board.get(square) != player:
+                    break
+                n += 1
+            for square in backward:
+                if board.get(square) != player:
+                    break
+                n += 1
+            if n >= self.k:
+                return 1000 if player == 'B' else -1000
+        return 0
+
+    #Lines that go through at least one of the player's stones, the only ones that can score for them
+    def player_lines(self, board, player):
+        lines = set()
+        for square, stone in board.items():
+            if stone == player:
+                lines.update(self.lines_through[square])
+        return lines
 
     #First evaluation function, this one checks if the current state of the board has a win somewhere in it
     def eval_func_one(self, state):
@@ -71,34 +103,12 @@ class Gomoku:
         if self.terminal_test(state):
             return state.utility
         
-        #Checking if there is a win for each direction (Row, Col, Diagonals)
-        def check_chain(board, action):
-            if (board.get((x, y), ".") == "B" 
-                and board.get((x + action[0], y + action[1]), ".") == "B"
-                and board.get((x + (action[0] * 2), y + (action[1] * 2)), ".") == "B"
-                and board.get((x + (action[0] * 3), y + (action[1] * 3)), ".") == "B"
-                and board.get((x + (action[0] * 4), y + (action[1] * 4)), ".") == "B"):
-                return True
-            return False
-        
+        #Each line full of B's is a win
         score = 0
-        actions = [(1, 0), (0, 1), (1, 1), (1, -1)]
         board = state.board
-
-        for x in range(1, self.h + 1):
-            for y in range(1, self.v + 1):
-                #Checking if each row has a win
-                if x + 4 <= self.h and check_chain(board, actions[0]):
-                    score += 1000
-                #Checking if each col has a win
-                if y + 4 <= self.v and check_chain(board, actions[1]):
-                    score += 1000
-                #Checking if each downward diagonal has a win
-                if (x + 4 <= self.h and y + 4 <= self.v) and check_chain(board, actions[2]):
-                    score += 1000
-                #Checking if each upward diagonal has a win
-                if (x + 4 <= self.h and y - 4 >= 1) and check_chain(board, actions[3]):
-                    score += 1000
+        for line in self.player_lines(board, "B"):
+            if all(board.get(square) == "B" for square in line):
+                score += 1000
         return score
 
     #Sevond evaluation function, this one counts up how many B's are in a row
@@ -107,87 +117,190 @@ class Gomoku:
         if self.terminal_test(state):
             return state.utility
         
-        #Checking how many B's in a row there are in each direction (Row, Col, Diagonals)
-        def count_b(board, action):
-            score = 0
-            chain = False
-            if board.get((x, y), ".") == "B":
-                chain = True
-                score += 10
-            if board.get((x + action[0], y + action[1]), ".") == "B" and chain: 
-                score += 20
-            else: 
-                chain = False
-            if board.get((x + (action[0] * 2), y + (action[1] * 2)), ".") == "B" and chain: 
-                score += 30
-            else: 
-                chain = False
-            if board.get((x + (action[0] * 3), y + (action[1] * 3)), ".") == "B" and chain: 
-                score += 40
-            else: 
-                chain = False
-            if board.get((x + (action[0] * 4), y + (action[1] * 4)), ".") == "B" and chain: 
-                score += 1000
-            return score
-                
+        #Each line scores 10, 20, 30... for every B in a row from its start, and 1000 more if the whole line is B's
         score = 0
-        actions = [(1, 0), (0, 1), (1, 1), (1, -1)]
         board = state.board
-
-        for x in range(1, self.h + 1):
-            for y in range(1, self.v + 1):
-                #Checking how many B's in a row there are in each row
-                if x + 4 <= self.h:
-                    score += count_b(board, actions[0])
-                #Checking how many B's in a row there are in each col
-                if y + 4 <= self.v:
-                    score += count_b(board, actions[1])
-                #Checking how many B's in a row there are in each downwards diagonal
-                if (x + 4 <= self.h and y + 4 <= self.v):
-                    score += count_b(board, actions[2])
-                #Checking how many B's in a row ther are in each upwards diagonal
-                if (x + 4 <= self.h and y - 4 >= 1):
-                    score += count_b(board, actions[3])
+        for line in self.player_lines(board, "B"):
+            for i, square in enumerate(line):
+                if board.get(square) != "B":
+                    break
+                score += 1000 if i == self.k - 1 else 10 * (i + 1)
         return score
         
     def __repr__(self):
         return '<{}>'.format(self.__class__.__name__)
 
+#Counters collected by alpha_beta_cutoff_search, broken down by the depth they happened at
+class SearchStats:
+    def __init__(self):
+        self.nodes = defaultdict(int)
+        self.leaves = defaultdict(int)
+        #Cutoffs at each depth, keyed by the index of the move that caused them
+        self.beta_cutoffs = defaultdict(lambda: defaultdict(int))
+        self.eval_time = defaultdict(float)
+        self.result_time = defaultdict(float)
+        self.total_time = 0.0
+
+    def total_nodes(self):
+        return sum(self.nodes.values())
+
+    def nodes_per_second(self):
+        return self.total_nodes() / self.total_time if self.total_time > 0 else 0.0
+
+    #Fraction of the nodes at a depth that were cut off
+    def cutoff_rate(self, depth):
+        return sum(self.beta_cutoffs[depth].values()) / self.nodes[depth] if self.nodes[depth] else 0.0
+
+    def to_dict(self):
+        depths = sorted(set(self.nodes) | set(self.leaves))
+        return {
+            "nodes": self.total_nodes(),
+            "leaves": sum(self.leaves.values()),
+            "total_time": self.total_time,
+            "nodes_per_second": self.nodes_per_second(),
+            "eval_time": sum(self.eval_time.values()),
+            "result_time": sum(self.result_time.values()),
+            "depths": {depth: {
+                "nodes": self.nodes[depth],
+                "leaves": self.leaves[depth],
+                "beta_cutoffs": dict(sorted(self.beta_cutoffs[depth].items())),
+                "cutoff_rate": self.cutoff_rate(depth),
+                "eval_time": self.eval_time[depth],
+                "result_time": self.result_time[depth],
+            } for depth in depths},
+        }
+
+    #Append the stats for a move as one JSON line to the given file
+    def log_json(self, path, move=None):
+        entry = self.to_dict()
+        entry["move"] = move
+        with open(path, "a") as log:
+            log.write(json.dumps(entry) + "\n")
+
+#Raised inside alpha_beta_cutoff_search when the time runs out or it is told to stop
+class SearchTimeout(Exception):
+    pass
+
 #Alpha-Beta Search function from games.py in the AIMA GitHub
-def alpha_beta_cutoff_search(state, game, eval_func, max_depth=2):
+#If time_limit (in seconds) is given, the search deepens one ply at a time and returns the move from the last depth it finished
+#If stats (a SearchStats) is given, the search records its counters in it
+#If stop (a threading.Event) is given, it is treated the same as running out of time
+def alpha_beta_cutoff_search(state, game, eval_func, max_depth=2, time_limit=None, stats=None, stop=None):
+    start_time = time.time()
+    deadline = start_time + time_limit if time_limit else None
+    evaluate = game.eval_func_one if eval_func == 1 else game.eval_func_two
+    result = game.result
+
+    timed = deadline is not None or stop is not None
+
+    #Versions of the evaluation and result functions that record their time, only called when counting
+    def counted_evaluate(state, depth):
+        eval_start = time.perf_counter()
+        value = evaluate(state)
+        stats.eval_time[depth] += time.perf_counter() - eval_start
+        stats.leaves[depth] += 1
+        return value
+
+    def counted_result(state, action, depth):
+        result_start = time.perf_counter()
+        child = result(state, action)
+        stats.result_time[depth] += time.perf_counter() - result_start
+        return child
+
+    depth_limit = max_depth
+
+    #Gives up on the whole depth once time is up, only called for timed searches
+    def check_time():
+        if (stop is not None and stop.is_set()) or (deadline is not None and time.time() >= deadline):
+            raise SearchTimeout
+
     #Max value function
     def max_value(state, alpha, beta, depth):
-        if depth > max_depth or game.terminal_test(state):
-            return game.eval_func_one(state) if eval_func == 1 else game.eval_func_two(state)
+        if stats is not None:
+            stats.nodes[depth] += 1
+        if timed:
+            check_time()
+        if depth > depth_limit or game.terminal_test(state):
+            return evaluate(state) if stats is None else counted_evaluate(state, depth)
         v = float("-inf")
-        for action in game.actions(state):
-            v = max(v, min_value(game.result(state, action), alpha, beta, depth + 1))
+        for i, action in enumerate(game.actions(state)):
+            child = result(state, action) if stats is None else counted_result(state, action, depth)
+            v = max(v, min_value(child, alpha, beta, depth + 1))
             if v >= beta:
+                if stats is not None:
+                    stats.beta_cutoffs[depth][i] += 1
                 return v
             alpha = max(alpha, v)
         return v
 
     #Min value function
     def min_value(state, alpha, beta, depth):
-        if depth > max_depth or game.terminal_test(state):
-            return game.eval_func_one(state) if eval_func == 1 else game.eval_func_two(state)
+        if stats is not None:
+            stats.nodes[depth] += 1
+        if timed:
+            check_time()
+        if depth > depth_limit or game.terminal_test(state):
+            return evaluate(state) if stats is None else counted_evaluate(state, depth)
         v = float("inf")
-        for action in game.actions(state):
-            v = min(v, max_value(game.result(state, action), alpha, beta, depth + 1))
+        for i, action in enumerate(game.actions(state)):
+            child = result(state, action) if stats is None else counted_result(state, action, depth)
+            v = min(v, max_value(child, alpha, beta, depth + 1))
             if v <= alpha:
+                #Recorded with the beta cutoffs since it is the same cutoff from W's side
+                if stats is not None:
+                    stats.beta_cutoffs[depth][i] += 1
                 return v
             beta = min(beta, v)
         return v
 
-    #Getting the move
-    alpha = float("-inf")
-    beta = float("inf")
-    move = None
-    for action in game.actions(state):
-        v = min_value(game.result(state, action), alpha, beta, 1)
-        if v > alpha:
-            alpha = v
-            move = action
+    #Getting the move, B maximizes the score and W minimizes it
+    #Only root moves that were searched all the way are kept in best[0]
+    def root_search(best, actions):
+        alpha = float("-inf")
+        beta = float("inf")
+        if stats is not None:
+            stats.nodes[0] += 1
+        for action in actions:
+            if state.to_move == "B":
+                child = result(state, action) if stats is None else counted_result(state, action, 0)
+                v = min_value(child, alpha, beta, 1)
+                if v > alpha or best[0] is None:
+                    alpha = v
+                    best[0] = action
+            else:
+                child = result(state, action) if stats is None else counted_result(state, action, 0)
+                v = max_value(child, alpha, beta, 1)
+                if v < beta or best[0] is None:
+                    beta = v
+                    best[0] = action
+        return best[0]
+
+    if not timed:
+        move = root_search([None], game.actions(state))
+    else:
+        #Try moves that win right away first, then moves that stop the opponent from winning right away
+        opponent = state._replace(to_move=("W" if state.to_move == "B" else "B"))
+        wins = [action for action in game.actions(state) if game.result(state, action).utility != 0]
+        blocks = [action for action in game.actions(state) if game.result(opponent, action).utility != 0]
+        actions = list(dict.fromkeys(wins + blocks + list(game.actions(state))))
+        move = None
+        #With no legal moves there is nothing to deepen, the same as the untimed search
+        for depth_limit in range(1, max_depth + 1 if actions else 1):
+            best = [None]
+            try:
+                move = root_search(best, actions)
+            except SearchTimeout:
+                #If not even the first depth finished, fall back to the best of the root moves it did finish
+                if move is None:
+                    move = best[0]
+                break
+            #Search the best move from this depth first on the next one
+            actions.remove(move)
+            actions.insert(0, move)
+        if move is None and actions:
+            move = actions[0]
+    if stats is not None:
+        stats.total_time += time.time() - start_time
     return move
 
 #Human player code modified from games.py in the AIMA GitHub
@@ -213,13 +326,19 @@ def human_player(game, state, preset=None, i=0):
     return move
 
 #Alpha-Beta player code modified from games.py in the AIMA GitHub
-def alpha_beta_player(game, state, eval_func):
-    ab_move = alpha_beta_cutoff_search(state, game, eval_func)
+#If log_path is given, the search stats for the move are appended to it as JSON
+def alpha_beta_player(game, state, eval_func, log_path=None):
+    if log_path:
+        stats = SearchStats()
+        ab_move = alpha_beta_cutoff_search(state, game, eval_func, stats=stats)
+        stats.log_json(log_path, ab_move)
+    else:
+        ab_move = alpha_beta_cutoff_search(state, game, eval_func)
     print("Alpha-Beta's move:", ab_move)
     return ab_move
 
 #Complete the first 3 moves of the game
-def initialize_game(game, state, eval_func, preset=None):
+def initialize_game(game, state, eval_func, preset=None, log_path=None):
     #Black's first move
     move = ((game.h // 2) + 1, (game.v // 2) + 1)
     print("Alpha-Beta's move:", move)
@@ -234,16 +353,20 @@ def initialize_game(game, state, eval_func, preset=None):
     print()
 
     #Black's second move
-    #Get legal actions based on the rules of Gomoku
+    #Get legal actions based on the rules of Gomoku, it has to be at least 3 spaces away from the center
+    center = ((game.h // 2) + 1, (game.v // 2) + 1)
     actions = []
     for action in game.actions(state):
-        if (action[0] <= 1 or action[0] >= 5) or (action[1] <= 1 or action[1] >= 5):
+        if abs(action[0] - center[0]) >= 3 or abs(action[1] - center[1]) >= 3:
             actions.append(action)
+    #Boards that are too small for the rule can use any move
+    if not actions:
+        actions = game.actions(state)
 
     #Update the states legal moves while keeping track of the old legal moves to re-use after getting Alpha-Beta's move
     original_moves = state.moves
     state = state._replace(moves = actions)
-    move = alpha_beta_player(game, state, eval_func)
+    move = alpha_beta_player(game, state, eval_func, log_path)
     state = state._replace(moves = original_moves)
     state = game.result(state, move)
     game.display(state)
@@ -256,33 +379,46 @@ def main():
         use_preset = False
     eval_func = int(input("Which evaluation function do you want to use (1 or 2)? "))
 
+    #The preset moves are for the standard 15x15 board with 5 in a row
+    if use_preset:
+        game = Gomoku()
+    else:
+        size = input("What board size do you want to use (default 15)? ")
+        k = input("How many in a row are needed to win (default 5)? ")
+        try:
+            game = Gomoku(int(size) if size else 15, int(size) if size else 15, int(k) if k else 5)
+        except ValueError as error:
+            print(error)
+            return
+    log_path = input("Where should the search stats for each move be logged (leave blank for none)? ")
+
     #Initialize the game
     start_time = time.time()
-    state = Gomoku().initial
-    Gomoku().display(state)
+    state = game.initial
+    game.display(state)
     print()
     if use_preset:
         #Predetermined moves for depth testing
         preset = [(1, 2), (2, 3), (3, 4), (4, 5), (1, 6), (2, 5), (4, 3), (5, 4), (2, 2), (2, 4), (2, 6), (7, 7), (10, 10), (9, 10), (10, 1), (9, 3), (8, 7), (7, 9)]
-        state = initialize_game(Gomoku(), state, eval_func, preset)
+        state = initialize_game(game, state, eval_func, preset, log_path)
         i = 1
     else:
-        state = initialize_game(Gomoku(), state, eval_func)
+        state = initialize_game(game, state, eval_func, log_path=log_path)
 
     #Continue taking turns until the game is over
-    while not Gomoku().terminal_test(state):
+    while not game.terminal_test(state):
         print()
         player = state.to_move
         if player == "B":
-            move = alpha_beta_player(Gomoku(), state, eval_func)
+            move = alpha_beta_player(game, state, eval_func, log_path)
         else:
             if use_preset:
-                move = human_player(Gomoku(), state, preset, i)
+                move = human_player(game, state, preset, i)
                 i += 1
             else:
-                move = human_player(Gomoku(), state)
-        state = Gomoku().result(state, move)
-        Gomoku().display(state)
+                move = human_player(game, state)
+        state = game.result(state, move)
+        game.display(state)
     print()
 
     #Display who won
@@ -297,4 +433,5 @@ def main():
     else:
         print("Time taken: %d mins and %.3f seconds" % ((time.time() - start_time) // 60, (time.time() - start_time) % 60))
 
-main()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
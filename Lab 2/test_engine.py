@@ -0,0 +1,33 @@
+import io
+import unittest
+
+from engine import PonderingEngine, run
+
+#Feed the engine a list of protocol lines and get back its replies
+def run_commands(lines):
+    output = io.StringIO()
+    run(PonderingEngine(2, 1, 0.1), io.StringIO("\n".join(lines) + "\n"), output)
+    return output.getvalue().splitlines()
+
+class BoardTest(unittest.TestCase):
+    def test_off_board_stone_is_an_error(self):
+        replies = run_commands(["START 15", "BOARD", "20,20,1", "3,3,2", "DONE", "END"])
+        self.assertEqual(replies[0], "OK")
+        self.assertTrue(replies[1].startswith("ERROR"))
+        self.assertEqual(len(replies), 2)
+
+    def test_duplicate_stone_is_an_error(self):
+        replies = run_commands(["START 15", "BOARD", "3,3,1", "3,3,2", "DONE", "END"])
+        self.assertTrue(replies[1].startswith("ERROR"))
+
+    def test_impossible_stone_counts_are_an_error(self):
+        replies = run_commands(["START 15", "BOARD", "3,3,1", "4,4,1", "5,5,2", "DONE", "END"])
+        self.assertTrue(replies[1].startswith("ERROR"))
+
+    def test_engine_keeps_running_after_a_bad_board(self):
+        replies = run_commands(["START 15", "BOARD", "20,20,1", "DONE", "BOARD", "7,7,2", "DONE", "END"])
+        self.assertTrue(replies[1].startswith("ERROR"))
+        self.assertFalse(replies[2].startswith("ERROR"))
+
+if __name__ == "__main__":
+    unittest.main()